@@ -123,26 +123,365 @@ def calcular_pe_unidades(cf, mc_unitaria):
 def calcular_pe_valor(pe_unidades, pvu):
     return pe_unidades * pvu
 
+# Função para calcular a margem de contribuição percentual
+def calcular_mc_percentual(mc_unitaria, pvu):
+    return (mc_unitaria / pvu) * 100 if pvu > 0 else 0
+
 # Função para calcular o lucro
 def calcular_lucro(quantidade, mc_unitaria, cf):
     return quantidade * mc_unitaria - cf
 
+# Função para calcular a receita total
+def calcular_receita(quantidade, pvu):
+    return quantidade * pvu
+
+# Função para calcular o custo total
+def calcular_custo(quantidade, cvu, cf):
+    return cf + quantidade * cvu
+
+# Função para calcular a margem de segurança em unidades
+def calcular_margem_seguranca(quantidade, pe_unidades):
+    return quantidade - pe_unidades
+
+# Função para calcular a margem de segurança percentual
+def calcular_margem_seguranca_percentual(margem_seguranca_unidades, quantidade):
+    return (margem_seguranca_unidades / quantidade) * 100 if quantidade > 0 else 0
+
+# Função para calcular a alavancagem operacional (não aplicável com lucro zero ou negativo)
+def calcular_alavancagem(quantidade, mc_unitaria, lucro):
+    if lucro <= 0:
+        return None
+    return (quantidade * mc_unitaria) / lucro
+
+# Registro compacto com o resultado de um único cenário
+class ResultadoCVL:
+    __slots__ = (
+        "pvu", "cvu", "cf", "quantidade", "mc_unitaria", "mc_percentual", "pe_unidades", "pe_valor",
+        "receita_total", "custo_total", "lucro", "margem_seguranca_unidades",
+        "margem_seguranca_percentual", "alavancagem", "moeda"
+    )
+
+    def __init__(self, pvu, cvu, cf, quantidade, mc_unitaria, mc_percentual, pe_unidades, pe_valor,
+                 receita_total, custo_total, lucro, margem_seguranca_unidades,
+                 margem_seguranca_percentual, alavancagem, moeda):
+        self.pvu = pvu
+        self.cvu = cvu
+        self.cf = cf
+        self.quantidade = quantidade
+        self.mc_unitaria = mc_unitaria
+        self.mc_percentual = mc_percentual
+        self.pe_unidades = pe_unidades
+        self.pe_valor = pe_valor
+        self.receita_total = receita_total
+        self.custo_total = custo_total
+        self.lucro = lucro
+        self.margem_seguranca_unidades = margem_seguranca_unidades
+        self.margem_seguranca_percentual = margem_seguranca_percentual
+        self.alavancagem = alavancagem
+        self.moeda = moeda
+
+# Lote colunar de resultados: uma matriz float64 (colunas x linhas), cada coluna contígua na memória
+class LoteCVL:
+    __slots__ = ("dados", "nomes")
+
+    # Mesmos campos do ResultadoCVL (exceto a moeda), para que cada linha seja interpretável sozinha
+    COLUNAS = (
+        'Quantidade', 'PVU', 'CVU', 'CF', 'MC Unitária', 'MC %', 'PE (unidades)', 'PE (valor)',
+        'Receita Total', 'Custo Total', 'Lucro', 'Margem de Segurança (%)', 'Alavancagem Operacional'
+    )
+
+    def __init__(self, dados, nomes=None):
+        if dados.ndim != 2 or dados.shape[0] != len(self.COLUNAS):
+            raise ValueError(f"Esperada uma matriz com {len(self.COLUNAS)} linhas (uma por coluna do lote).")
+        # Nomes em array de largura fixa: fatias sem cópia e memória por linha conhecida
+        nomes = None if nomes is None else np.asarray(nomes, dtype=str)
+        if nomes is not None and (nomes.ndim != 1 or len(nomes) != dados.shape[1]):
+            raise ValueError(f"Esperados {dados.shape[1]} nomes (um por linha do lote); recebidos {nomes.size}.")
+        self.dados = dados
+        self.nomes = nomes
+
+    # Calcular um lote inteiro de uma só vez; aceita escalares ou arrays (com broadcast)
+    @classmethod
+    def calcular(cls, pvu, cvu, cf, quantidade, nomes=None):
+        pvu, cvu, cf, quantidade = np.broadcast_arrays(
+            *(np.asarray(valor, dtype=float) for valor in (pvu, cvu, cf, quantidade))
+        )
+        dados = np.empty((len(cls.COLUNAS), pvu.size))
+        (quantidade_l, pvu_l, cvu_l, cf_l, mc, mc_percentual, pe_unidades, pe_valor,
+         receita, custo, lucro, margem_seguranca, alavancagem) = dados
+
+        quantidade_l[:] = quantidade.ravel()
+        pvu_l[:] = pvu.ravel()
+        cvu_l[:] = cvu.ravel()
+        cf_l[:] = cf.ravel()
+        np.subtract(pvu_l, cvu_l, out=mc)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mc_percentual[:] = np.where(pvu_l > 0, mc / pvu_l * 100, 0.0)
+            pe_unidades[:] = np.where(mc > 0, cf_l / mc, np.inf)
+        np.multiply(pe_unidades, pvu_l, out=pe_valor)
+        np.multiply(quantidade_l, pvu_l, out=receita)
+        np.multiply(quantidade_l, cvu_l, out=custo)
+        custo += cf_l
+        np.subtract(receita, custo, out=lucro)
+
+        # Mesmas regras de gerar_dados_grafico: NaN onde a métrica não é definida
+        mc_total = quantidade_l * mc
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margem_seguranca[:] = np.where(mc_total > 0, lucro / mc_total * 100, np.nan)
+            alavancagem[:] = np.where(lucro > 0, mc_total / lucro, np.nan)
+
+        return cls(dados, nomes)
+
+    def __len__(self):
+        return self.dados.shape[1]
+
+    # lote['Lucro'] devolve a coluna; lote[a:b] devolve um novo lote — ambos sem cópia
+    def __getitem__(self, chave):
+        if isinstance(chave, str):
+            return self.coluna(chave)
+        if not isinstance(chave, slice):
+            raise TypeError("Use o nome de uma coluna ou uma fatia de linhas.")
+        return LoteCVL(self.dados[:, chave], None if self.nomes is None else self.nomes[chave])
+
+    def coluna(self, nome):
+        return self.dados[self.COLUNAS.index(nome)]
+
+    def indice(self, nome):
+        posicoes = np.flatnonzero(self.nomes == nome)
+        if not len(posicoes):
+            raise KeyError(nome)
+        return posicoes[0]
+
+    def bytes_por_linha(self):
+        tamanho = self.dados.shape[0] * self.dados.itemsize
+        if self.nomes is not None:
+            tamanho += self.nomes.itemsize
+        return tamanho
+
+    # Converter para DataFrame sem copiar os valores (o bloco do pandas aponta para a mesma matriz)
+    def para_dataframe(self):
+        indice = None if self.nomes is None else pd.Index(self.nomes, name='Cenário')
+        return pd.DataFrame(self.dados.T, columns=list(self.COLUNAS), index=indice, copy=False)
+
+    # Converter para tabela Arrow; as colunas numéricas são compartilhadas sem cópia
+    def para_arrow(self):
+        try:
+            import pyarrow as pa
+        except ImportError as erro:
+            raise ImportError("A exportação para Arrow requer o pacote 'pyarrow' (pip install pyarrow).") from erro
+        colunas = {nome: pa.array(self.dados[i]) for i, nome in enumerate(self.COLUNAS)}
+        if self.nomes is not None:
+            colunas = {'Cenário': pa.array(self.nomes, type=pa.string()), **colunas}
+        return pa.table(colunas)
+
+# Função para criar os cenários de simulação padrão
+def get_cenarios_padrao():
+    # Fatores multiplicam os valores informados; valores fixos (quando definidos) os substituem
+    return {
+        "Base": {"pvu": 1.0, "cvu": 1.0, "cf": 1.0, "pvu_fixo": None, "cvu_fixo": None, "cf_fixo": None},
+        "Otimista": {"pvu": 1.1, "cvu": 0.95, "cf": 0.98, "pvu_fixo": None, "cvu_fixo": None, "cf_fixo": None},
+        "Pessimista": {"pvu": 0.95, "cvu": 1.05, "cf": 1.1, "pvu_fixo": None, "cvu_fixo": None, "cf_fixo": None}
+    }
+
+# Colunas do editor de cenários e a chave correspondente no dicionário de cenários
+COLUNAS_CENARIOS = {
+    "Fator PVU": "pvu",
+    "Fator CVU": "cvu",
+    "Fator CF": "cf",
+    "PVU fixo": "pvu_fixo",
+    "CVU fixo": "cvu_fixo",
+    "CF fixo": "cf_fixo"
+}
+
+# Função para converter os cenários em tabela para o editor
+def cenarios_para_tabela(cenarios):
+    linhas = [
+        {"Cenário": nome, **{coluna: fatores[chave] for coluna, chave in COLUNAS_CENARIOS.items()}}
+        for nome, fatores in cenarios.items()
+    ]
+    return pd.DataFrame(linhas, columns=["Cenário", *COLUNAS_CENARIOS]).astype({coluna: float for coluna in COLUNAS_CENARIOS})
+
+# Função para ler os cenários editados pelo usuário
+# Devolve os cenários válidos e a lista de linhas ignoradas (sem nome ou com nome repetido)
+def ler_cenarios(tabela):
+    cenarios = {}
+    ignorados = []
+    for linha in tabela.to_dict("records"):
+        nome = linha.get("Cenário")
+        # Linhas novas do editor chegam com NaN até o nome ser digitado: ignorar sem aviso
+        if nome is None or pd.isna(nome):
+            continue
+        nome = str(nome).strip()
+        if not nome:
+            ignorados.append("(nome em branco)")
+            continue
+        if nome in cenarios:
+            ignorados.append(f"{nome} (nome repetido)")
+            continue
+        fatores = {}
+        for coluna, chave in COLUNAS_CENARIOS.items():
+            valor = linha.get(coluna)
+            valor = None if valor is None or pd.isna(valor) else float(valor)
+            # Fatores ausentes equivalem a não alterar o valor informado
+            if valor is None and not chave.endswith("_fixo"):
+                valor = 1.0
+            fatores[chave] = valor
+        cenarios[nome] = fatores
+    return cenarios, ignorados
+
+# Função para avaliar todos os cenários de uma só vez (vetorizada)
+def avaliar_cenarios(pvu, cvu, cf, quantidade, cenarios):
+    nomes = list(cenarios.keys())
+
+    def ajustar(valor, chave):
+        fatores = np.array([cenarios[n][chave] for n in nomes], dtype=float)
+        fixos = np.array([np.nan if cenarios[n][chave + "_fixo"] is None else cenarios[n][chave + "_fixo"] for n in nomes], dtype=float)
+        return np.where(np.isnan(fixos), valor * fatores, fixos)
+
+    return LoteCVL.calcular(ajustar(pvu, "pvu"), ajustar(cvu, "cvu"), ajustar(cf, "cf"), quantidade, nomes)
+
+# Função para exibir a tabela e o gráfico comparativo dos cenários
+def exibir_comparacao_cenarios(df_cenarios, moeda, quantidade, quantidade_referencia):
+    st.markdown("<h3 class='sub-header'>Comparação de Cenários</h3>", unsafe_allow_html=True)
+    st.caption(f"Receita, custo e lucro da tabela calculados para a quantidade vendida informada na barra lateral ({quantidade} unidades).")
+    
+    st.dataframe(
+        df_cenarios.style.format({
+            'Quantidade': '{:.0f}',
+            'CVU': f'{moeda} {{:.2f}}',
+            'CF': f'{moeda} {{:.2f}}',
+            'MC Unitária': f'{moeda} {{:.2f}}',
+            'MC %': '{:.1f}%',
+            'PE (unidades)': '{:.0f}',
+            'PE (valor)': f'{moeda} {{:.2f}}',
+            'Receita Total': f'{moeda} {{:.2f}}',
+            'Custo Total': f'{moeda} {{:.2f}}',
+            'Lucro': f'{moeda} {{:.2f}}',
+            'Margem de Segurança (%)': '{:.1f}%',
+            'Alavancagem Operacional': '{:.2f}'
+        }, na_rep='Não aplicável'),
+        use_container_width=True
+    )
+    
+    pe_finitos = df_cenarios['PE (unidades)'][np.isfinite(df_cenarios['PE (unidades)'])]
+    quantidade_max = max(quantidade_referencia, pe_finitos.max() if len(pe_finitos) else 0, 100) * 1.5
+    fig_cenarios = criar_grafico_cenarios(df_cenarios, quantidade_max, moeda)
+    st.plotly_chart(fig_cenarios, use_container_width=True)
+
 # Função para gerar dados para o gráfico
 def gerar_dados_grafico(pvu, cvu, cf, quantidade_max):
     # Criar um range de quantidade de 0 até o máximo escolhido
     quantidades = np.linspace(0, quantidade_max * 1.5, 100)
     
     # Calcular receita total, custo total e lucro para cada quantidade
-    receita_total = [q * pvu for q in quantidades]
-    custo_total = [cf + q * cvu for q in quantidades]
-    lucro = [r - c for r, c in zip(receita_total, custo_total)]
+    receita_total = quantidades * pvu
+    custo_total = cf + quantidades * cvu
+    lucro = receita_total - custo_total
+    
+    # Margem de segurança (%) = lucro ÷ MC total, equivalente a (Q - PE) ÷ Q; negativa abaixo do PE
+    # Alavancagem operacional = MC total ÷ lucro; indefinida (NaN) com lucro zero ou negativo
+    mc_total = quantidades * (pvu - cvu)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        margem_seguranca = np.where(mc_total > 0, lucro / mc_total * 100, np.nan)
+        alavancagem = np.where(lucro > 0, mc_total / lucro, np.nan)
     
     # Retornar os dados em um DataFrame
     return pd.DataFrame({
         'Quantidade': quantidades,
         'Receita Total': receita_total,
         'Custo Total': custo_total,
-        'Lucro': lucro
+        'Lucro': lucro,
+        'Margem de Segurança (%)': margem_seguranca,
+        'Alavancagem Operacional': alavancagem
+    })
+
+# Grafo de dependências das métricas: recalcula apenas o que depende de entradas alteradas
+class GrafoMetricas:
+    def __init__(self, nos):
+        # nos: {nome: (função, [dependências])}; nomes fora de `nos` são entradas
+        self.nos = nos
+        self.valores = {}
+        self.versoes = {}
+        self.versoes_usadas = {}
+
+    @staticmethod
+    def _iguais(a, b):
+        if a is b:
+            return True
+        if isinstance(a, pd.DataFrame) or isinstance(b, pd.DataFrame):
+            return isinstance(a, pd.DataFrame) and a.equals(b)
+        if isinstance(a, LoteCVL) or isinstance(b, LoteCVL):
+            return (isinstance(a, LoteCVL) and isinstance(b, LoteCVL)
+                    and GrafoMetricas._iguais(a.dados, b.dados) and GrafoMetricas._iguais(a.nomes, b.nomes))
+        if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+            if not (isinstance(a, np.ndarray) and isinstance(b, np.ndarray)):
+                return False
+            try:
+                return np.array_equal(a, b, equal_nan=True)
+            except TypeError:
+                # Arrays de objetos (ex.: nomes) não aceitam equal_nan
+                return np.array_equal(a, b)
+        try:
+            return bool(a == b)
+        except (TypeError, ValueError):
+            return False
+
+    # Definir o valor de uma entrada (ou de um nó recalculado); só gera nova versão se o valor mudou
+    def definir(self, nome, valor):
+        if nome in self.valores and self._iguais(self.valores[nome], valor):
+            return
+        self.valores[nome] = valor
+        self.versoes[nome] = self.versoes.get(nome, 0) + 1
+
+    # Obter o valor de um nó, recalculando-o apenas se alguma dependência mudou de versão
+    def obter(self, nome):
+        if nome not in self.nos:
+            return self.valores[nome]
+        funcao, dependencias = self.nos[nome]
+        argumentos = [self.obter(dependencia) for dependencia in dependencias]
+        versoes = tuple(self.versoes[dependencia] for dependencia in dependencias)
+        if self.versoes_usadas.get(nome) != versoes:
+            # Calcular antes de registrar as versões: se a função falhar, o nó continua pendente
+            valor = funcao(*argumentos)
+            self.definir(nome, valor)
+            self.versoes_usadas[nome] = versoes
+        return self.valores[nome]
+
+# Função para criar o grafo de métricas
+# Entradas: pvu_informado, cvu_informado, cf_informado, quantidade, cenarios, cenario, quantidade_simulada, moeda
+def criar_grafo_metricas():
+    return GrafoMetricas({
+        "comparacao_cenarios": (avaliar_cenarios, ["pvu_informado", "cvu_informado", "cf_informado", "quantidade", "cenarios"]),
+        "pvu": (lambda lote, cenario: lote.coluna('PVU')[lote.indice(cenario)], ["comparacao_cenarios", "cenario"]),
+        "cvu": (lambda lote, cenario: lote.coluna('CVU')[lote.indice(cenario)], ["comparacao_cenarios", "cenario"]),
+        "cf": (lambda lote, cenario: lote.coluna('CF')[lote.indice(cenario)], ["comparacao_cenarios", "cenario"]),
+        "mc_unitaria": (calcular_mc, ["pvu", "cvu"]),
+        "mc_percentual": (calcular_mc_percentual, ["mc_unitaria", "pvu"]),
+        "pe_unidades": (calcular_pe_unidades, ["cf", "mc_unitaria"]),
+        "pe_valor": (calcular_pe_valor, ["pe_unidades", "pvu"]),
+        # Resultado para a quantidade informada
+        "receita_total": (calcular_receita, ["quantidade", "pvu"]),
+        "custo_total": (calcular_custo, ["quantidade", "cvu", "cf"]),
+        "lucro": (calcular_lucro, ["quantidade", "mc_unitaria", "cf"]),
+        # Resultado para a quantidade simulada no slider
+        "receita_simulada": (calcular_receita, ["quantidade_simulada", "pvu"]),
+        "custo_simulado": (calcular_custo, ["quantidade_simulada", "cvu", "cf"]),
+        "lucro_simulado": (calcular_lucro, ["quantidade_simulada", "mc_unitaria", "cf"]),
+        "margem_seguranca_unidades": (calcular_margem_seguranca, ["quantidade_simulada", "pe_unidades"]),
+        "margem_seguranca_percentual": (calcular_margem_seguranca_percentual, ["margem_seguranca_unidades", "quantidade_simulada"]),
+        "alavancagem": (calcular_alavancagem, ["quantidade_simulada", "mc_unitaria", "lucro_simulado"]),
+        "dados_grafico": (
+            lambda pvu, cvu, cf, quantidade, quantidade_simulada, pe_unidades: gerar_dados_grafico(
+                pvu, cvu, cf, max(quantidade, quantidade_simulada, pe_unidades * 1.5)
+            ),
+            ["pvu", "cvu", "cf", "quantidade", "quantidade_simulada", "pe_unidades"]
+        ),
+        # Resultado compartilhado entre exibição, interpretação e exportação
+        "resultado": (ResultadoCVL, [
+            "pvu", "cvu", "cf", "quantidade_simulada", "mc_unitaria", "mc_percentual", "pe_unidades", "pe_valor",
+            "receita_simulada", "custo_simulado", "lucro_simulado", "margem_seguranca_unidades",
+            "margem_seguranca_percentual", "alavancagem", "moeda"
+        ])
     })
 
 # Função para criar o gráfico CVL
@@ -264,6 +603,178 @@ def criar_grafico_cvl(df, pe_unidades, moeda, quantidade_atual=None):
     
     return fig
 
+# Função para criar o gráfico comparativo dos cenários
+def criar_grafico_cenarios(df_cenarios, quantidade_max, moeda):
+    fig = go.Figure()
+    cores = px.colors.qualitative.Plotly
+
+    # As retas de CVL são lineares: um eixo de dois pontos, compartilhado por todos os cenários, basta
+    quantidades = np.array([0.0, quantidade_max])
+    receitas = np.outer(df_cenarios['PVU'].to_numpy(), quantidades)
+    custos = df_cenarios['CF'].to_numpy()[:, None] + np.outer(df_cenarios['CVU'].to_numpy(), quantidades)
+    lucros = receitas - custos
+
+    for i, nome in enumerate(df_cenarios.index):
+        cor = cores[i % len(cores)]
+        fig.add_trace(go.Scatter(
+            x=quantidades,
+            y=lucros[i],
+            mode='lines',
+            name=nome,
+            legendgroup=nome,
+            line=dict(color=cor, width=3)
+        ))
+        fig.add_trace(go.Scatter(
+            x=quantidades,
+            y=receitas[i],
+            mode='lines',
+            name=f'{nome} - Receita Total',
+            legendgroup=nome,
+            showlegend=False,
+            line=dict(color=cor, width=1, dash='dash')
+        ))
+        fig.add_trace(go.Scatter(
+            x=quantidades,
+            y=custos[i],
+            mode='lines',
+            name=f'{nome} - Custo Total',
+            legendgroup=nome,
+            showlegend=False,
+            line=dict(color=cor, width=1, dash='dot')
+        ))
+
+        # Marcar o ponto de equilíbrio do cenário, quando existir
+        pe = df_cenarios['PE (unidades)'].iloc[i]
+        if np.isfinite(pe):
+            fig.add_trace(go.Scatter(
+                x=[pe],
+                y=[0],
+                mode='markers',
+                name=f'{nome} - Ponto de Equilíbrio',
+                legendgroup=nome,
+                showlegend=False,
+                marker=dict(color=cor, size=12, symbol='star')
+            ))
+
+    # Adicionar linha horizontal em y=0
+    fig.add_shape(
+        type="line",
+        x0=0,
+        y0=0,
+        x1=quantidade_max,
+        y1=0,
+        line=dict(color="black", width=1, dash="dash"),
+    )
+
+    fig.update_layout(
+        title='Comparação de Cenários (Lucro: linha cheia; Receita: tracejada; Custo: pontilhada)',
+        xaxis_title='Quantidade (unidades)',
+        yaxis_title=f'Valor ({moeda})',
+        height=600,
+        template='plotly_white',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig
+
+# Função para criar o gráfico da margem de segurança ao longo do volume
+def criar_grafico_margem_seguranca(df, pe_unidades, quantidade_atual=None, margem_atual=None):
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=df['Quantidade'],
+        y=df['Margem de Segurança (%)'],
+        mode='lines',
+        name='Margem de Segurança',
+        line=dict(color='#009688', width=3)
+    ))
+    
+    # Adicionar linha vertical no ponto de equilíbrio (margem de segurança zero)
+    fig.add_vline(x=pe_unidades, line=dict(color="black", width=1, dash="dash"))
+    fig.add_hline(y=0, line=dict(color="black", width=1, dash="dash"))
+    
+    # Marcar a quantidade atual com o valor exato (não o ponto mais próximo da grade)
+    if quantidade_atual is not None and margem_atual is not None and quantidade_atual > 0:
+        if np.isfinite(margem_atual):
+            fig.add_trace(go.Scatter(
+                x=[quantidade_atual],
+                y=[margem_atual],
+                mode='markers',
+                name='Situação Atual',
+                marker=dict(color='#673AB7', size=10)
+            ))
+    
+    # Abaixo do PE a margem cai rapidamente; limitar o eixo para manter a curva legível
+    fig.update_layout(
+        title='Margem de Segurança por Volume',
+        xaxis_title='Quantidade (unidades)',
+        yaxis_title='Margem de Segurança (%)',
+        yaxis_range=[-100, 100],
+        height=400,
+        template='plotly_white',
+        showlegend=False
+    )
+    
+    return fig
+
+# Função para criar o gráfico da alavancagem operacional ao longo do volume
+def criar_grafico_alavancagem(df, pe_unidades, quantidade_atual=None, alavancagem_atual=None, limite=20):
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=df['Quantidade'],
+        y=df['Alavancagem Operacional'],
+        mode='lines',
+        name='Alavancagem Operacional',
+        line=dict(color='#FF9800', width=3)
+    ))
+    
+    # Abaixo do ponto de equilíbrio a alavancagem não é definida
+    fig.add_vrect(
+        x0=0,
+        x1=pe_unidades,
+        fillcolor='rgba(244, 67, 54, 0.1)',
+        line_width=0,
+        annotation_text='Não aplicável (prejuízo)',
+        annotation_position='top left'
+    )
+    fig.add_vline(x=pe_unidades, line=dict(color="black", width=1, dash="dash"))
+    
+    # Marcar a quantidade atual com o valor exato; perto do PE a grade erraria bastante
+    if quantidade_atual is not None and alavancagem_atual is not None:
+        if np.isfinite(alavancagem_atual):
+            # Acima do limite do eixo, desenhar o ponto no limite e mostrar o valor real
+            acima_do_limite = alavancagem_atual > limite
+            fig.add_trace(go.Scatter(
+                x=[quantidade_atual],
+                y=[min(alavancagem_atual, limite)],
+                mode='markers+text' if acima_do_limite else 'markers',
+                name='Situação Atual',
+                text=[f'GAO = {alavancagem_atual:.1f}x'] if acima_do_limite else None,
+                textposition='bottom right',
+                cliponaxis=False,
+                marker=dict(color='#673AB7', size=10, symbol='triangle-up' if acima_do_limite else 'circle')
+            ))
+    
+    # Perto do PE a alavancagem tende ao infinito; limitar o eixo para manter a curva legível
+    fig.update_layout(
+        title=f'Alavancagem Operacional por Volume (eixo limitado a {limite}x)',
+        xaxis_title='Quantidade (unidades)',
+        yaxis_title='Grau de Alavancagem Operacional',
+        yaxis_range=[0, limite],
+        height=400,
+        template='plotly_white',
+        showlegend=False
+    )
+    
+    return fig
+
 # Função para criar um gráfico de barras de margem de contribuição
 def criar_grafico_mc(pvu, cvu, mc, moeda):
     fig = go.Figure()
@@ -284,7 +795,7 @@ def criar_grafico_mc(pvu, cvu, mc, moeda):
     return fig
 
 # Função para gerar PDF (simples - exporta como CSV nesta implementação)
-def gerar_relatorio(dados, resultados):
+def gerar_relatorio(resultado):
     # Criar um DataFrame com os resultados
     df_resultados = pd.DataFrame({
         'Métrica': [
@@ -301,17 +812,17 @@ def gerar_relatorio(dados, resultados):
             'Lucro/Prejuízo'
         ],
         'Valor': [
-            f"{resultados['moeda']} {dados['pvu']:.2f}",
-            f"{resultados['moeda']} {dados['cvu']:.2f}",
-            f"{resultados['moeda']} {dados['cf']:.2f}",
-            f"{dados['quantidade']} unidades",
-            f"{resultados['moeda']} {resultados['mc_unitaria']:.2f}",
-            f"{resultados['mc_percentual']:.1f}%",
-            f"{resultados['pe_unidades']:.0f} unidades",
-            f"{resultados['moeda']} {resultados['pe_valor']:.2f}",
-            f"{resultados['moeda']} {resultados['receita_total']:.2f}",
-            f"{resultados['moeda']} {resultados['custo_total']:.2f}",
-            f"{resultados['moeda']} {resultados['lucro']:.2f}"
+            f"{resultado.moeda} {resultado.pvu:.2f}",
+            f"{resultado.moeda} {resultado.cvu:.2f}",
+            f"{resultado.moeda} {resultado.cf:.2f}",
+            f"{resultado.quantidade} unidades",
+            f"{resultado.moeda} {resultado.mc_unitaria:.2f}",
+            f"{resultado.mc_percentual:.1f}%",
+            f"{resultado.pe_unidades:.0f} unidades",
+            f"{resultado.moeda} {resultado.pe_valor:.2f}",
+            f"{resultado.moeda} {resultado.receita_total:.2f}",
+            f"{resultado.moeda} {resultado.custo_total:.2f}",
+            f"{resultado.moeda} {resultado.lucro:.2f}"
         ]
     })
     
@@ -324,47 +835,47 @@ def gerar_relatorio(dados, resultados):
     return href
 
 # Função para interpretar os resultados
-def interpretar_resultados(dados, resultados):
+def interpretar_resultados(resultado):
     interpretacao = ""
     
     # Verificar se está acima ou abaixo do ponto de equilíbrio
-    if dados['quantidade'] < resultados['pe_unidades']:
-        gap = resultados['pe_unidades'] - dados['quantidade']
+    if resultado.quantidade < resultado.pe_unidades:
+        gap = resultado.pe_unidades - resultado.quantidade
         interpretacao += f"""
         <div class='warning'>
             <strong>Situação de Prejuízo:</strong> A empresa está operando <strong>{gap:.0f} unidades abaixo</strong> do ponto de equilíbrio.
-            Com {dados['quantidade']} unidades vendidas, a empresa tem um prejuízo de {resultados['moeda']} {abs(resultados['lucro']):.2f}.
+            Com {resultado.quantidade} unidades vendidas, a empresa tem um prejuízo de {resultado.moeda} {abs(resultado.lucro):.2f}.
         </div>
         <div class='conclusion'>
             <strong>Recomendação:</strong> Para atingir o ponto de equilíbrio, é necessário vender mais {gap:.0f} unidades 
-            ou reduzir custos fixos em {resultados['moeda']} {abs(resultados['lucro']):.2f}.
+            ou reduzir custos fixos em {resultado.moeda} {abs(resultado.lucro):.2f}.
         </div>
         """
     else:
-        margem = dados['quantidade'] - resultados['pe_unidades']
-        margem_percentual = (margem / resultados['pe_unidades']) * 100
+        margem = resultado.quantidade - resultado.pe_unidades
+        margem_percentual = (margem / resultado.pe_unidades) * 100
         interpretacao += f"""
         <div class='conclusion'>
             <strong>Situação de Lucro:</strong> A empresa está operando <strong>{margem:.0f} unidades acima</strong> do ponto de equilíbrio 
             (margem de segurança de {margem_percentual:.1f}%).
-            Com {dados['quantidade']} unidades vendidas, a empresa tem um lucro de {resultados['moeda']} {resultados['lucro']:.2f}.
+            Com {resultado.quantidade} unidades vendidas, a empresa tem um lucro de {resultado.moeda} {resultado.lucro:.2f}.
         </div>
         """
     
     # Análise da margem de contribuição
-    if resultados['mc_percentual'] < 30:
+    if resultado.mc_percentual < 30:
         interpretacao += f"""
         <div class='warning'>
-            <strong>Margem de Contribuição Baixa:</strong> A margem de contribuição de {resultados['mc_percentual']:.1f}% é relativamente baixa.
-            Isso significa que para cada {resultados['moeda']} 100 em vendas, apenas {resultados['mc_percentual']:.1f} contribuem para cobrir 
+            <strong>Margem de Contribuição Baixa:</strong> A margem de contribuição de {resultado.mc_percentual:.1f}% é relativamente baixa.
+            Isso significa que para cada {resultado.moeda} 100 em vendas, apenas {resultado.mc_percentual:.1f} contribuem para cobrir 
             os custos fixos e gerar lucro.
         </div>
         """
-    elif resultados['mc_percentual'] > 60:
+    elif resultado.mc_percentual > 60:
         interpretacao += f"""
         <div class='conclusion'>
-            <strong>Margem de Contribuição Alta:</strong> A margem de contribuição de {resultados['mc_percentual']:.1f}% é excelente.
-            Isso significa que para cada {resultados['moeda']} 100 em vendas, {resultados['mc_percentual']:.1f} contribuem para cobrir 
+            <strong>Margem de Contribuição Alta:</strong> A margem de contribuição de {resultado.mc_percentual:.1f}% é excelente.
+            Isso significa que para cada {resultado.moeda} 100 em vendas, {resultado.mc_percentual:.1f} contribuem para cobrir 
             os custos fixos e gerar lucro.
         </div>
         """
@@ -455,17 +966,29 @@ def main():
     # Adicionar seção para simulações de cenários
     st.sidebar.subheader("Simulação de Cenários")
     
+    # Cenários definidos pelo usuário (fatores multiplicadores ou valores fixos)
+    with st.sidebar.expander("Definir cenários", expanded=False):
+        st.caption("Fatores multiplicam os valores informados. Valores fixos, quando preenchidos, os substituem.")
+        tabela_cenarios = st.data_editor(
+            cenarios_para_tabela(get_cenarios_padrao()),
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={
+                coluna: st.column_config.NumberColumn(min_value=0)
+                for coluna in COLUNAS_CENARIOS
+            }
+        )
+    
+    cenarios, cenarios_ignorados = ler_cenarios(tabela_cenarios)
+    if cenarios_ignorados:
+        st.sidebar.warning("Cenários ignorados: " + "; ".join(cenarios_ignorados) + ". Dê a cada cenário um nome único.")
+    if not cenarios:
+        cenarios = {"Base": get_cenarios_padrao()["Base"]}
+    
     cenario = st.sidebar.radio(
         "Selecione um cenário para simular:",
-        ["Base", "Otimista", "Pessimista"]
+        list(cenarios.keys())
     )
-    
-    # Fatores de ajuste para cada cenário
-    fatores_cenario = {
-        "Base": {"pvu": 1.0, "cvu": 1.0, "cf": 1.0},
-        "Otimista": {"pvu": 1.1, "cvu": 0.95, "cf": 0.98},
-        "Pessimista": {"pvu": 0.95, "cvu": 1.05, "cf": 1.1}
-    }
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("""
@@ -476,45 +999,42 @@ def main():
     © 2025 - Prof. José Américo – Universidade Cândido Mendes
     """)
     
+    # Grafo de métricas da sessão: entre execuções, só recalcula o que depende das entradas alteradas
+    if "grafo_metricas" not in st.session_state:
+        st.session_state["grafo_metricas"] = criar_grafo_metricas()
+    grafo = st.session_state["grafo_metricas"]
+    
+    grafo.definir("pvu_informado", pvu)
+    grafo.definir("cvu_informado", cvu)
+    grafo.definir("cf_informado", cf)
+    grafo.definir("quantidade", quantidade)
+    grafo.definir("cenarios", cenarios)
+    grafo.definir("cenario", cenario)
+    grafo.definir("moeda", moeda)
+    
+    # Avaliar todos os cenários de uma só vez
+    df_cenarios = grafo.obter("comparacao_cenarios").para_dataframe()
+    
     # Ajustar valores com base no cenário
-    pvu_simulado = pvu * fatores_cenario[cenario]["pvu"]
-    cvu_simulado = cvu * fatores_cenario[cenario]["cvu"]
-    cf_simulado = cf * fatores_cenario[cenario]["cf"]
+    pvu_simulado = grafo.obter("pvu")
+    cvu_simulado = grafo.obter("cvu")
+    cf_simulado = grafo.obter("cf")
     
-    # Mostrar os valores ajustados se não for o cenário base
-    if cenario != "Base":
+    # Mostrar os valores ajustados se o cenário alterar algum valor
+    if (pvu_simulado, cvu_simulado, cf_simulado) != (pvu, cvu, cf):
         st.sidebar.markdown("**Valores ajustados para o cenário:**")
         st.sidebar.markdown(f"* PVU: {moeda} {pvu_simulado:.2f} ({'+' if pvu_simulado > pvu else ''}{((pvu_simulado/pvu)-1)*100:.1f}%)")
         st.sidebar.markdown(f"* CVU: {moeda} {cvu_simulado:.2f} ({'+' if cvu_simulado > cvu else ''}{((cvu_simulado/cvu)-1)*100:.1f}%)")
         st.sidebar.markdown(f"* CF: {moeda} {cf_simulado:.2f} ({'+' if cf_simulado > cf else ''}{((cf_simulado/cf)-1)*100:.1f}%)")
     
     # Cálculos principais
-    mc_unitaria = calcular_mc(pvu_simulado, cvu_simulado)
-    mc_percentual = (mc_unitaria / pvu_simulado) * 100 if pvu_simulado > 0 else 0
-    pe_unidades = calcular_pe_unidades(cf_simulado, mc_unitaria)
-    pe_valor = calcular_pe_valor(pe_unidades, pvu_simulado)
-    lucro = calcular_lucro(quantidade, mc_unitaria, cf_simulado)
-    receita_total = quantidade * pvu_simulado
-    custo_total = cf_simulado + (quantidade * cvu_simulado)
-    
-    # Armazenar resultados em um dicionário
-    dados = {
-        "pvu": pvu_simulado,
-        "cvu": cvu_simulado,
-        "cf": cf_simulado,
-        "quantidade": quantidade
-    }
-    
-    resultados = {
-        "mc_unitaria": mc_unitaria,
-        "mc_percentual": mc_percentual,
-        "pe_unidades": pe_unidades,
-        "pe_valor": pe_valor,
-        "lucro": lucro,
-        "receita_total": receita_total,
-        "custo_total": custo_total,
-        "moeda": moeda
-    }
+    mc_unitaria = grafo.obter("mc_unitaria")
+    mc_percentual = grafo.obter("mc_percentual")
+    pe_unidades = grafo.obter("pe_unidades")
+    pe_valor = grafo.obter("pe_valor")
+    lucro = grafo.obter("lucro")
+    receita_total = grafo.obter("receita_total")
+    custo_total = grafo.obter("custo_total")
     
     # Introdução Teórica
     with st.expander("📚 Fundamentos da Análise Custo-Volume-Lucro", expanded=False):
@@ -533,6 +1053,7 @@ def main():
         st.info("**Ponto de Equilíbrio em Valor:** PE$ = PE × Preço de Venda Unitário")
         st.info("**Lucro Operacional:** Lucro = (PVU - CVU) × Quantidade - Custos Fixos")
         st.info("**Margem de Segurança:** MS = (Vendas Atuais - Vendas no Ponto de Equilíbrio) ÷ Vendas Atuais")
+        st.info("**Alavancagem Operacional:** GAO = Margem de Contribuição Total ÷ Lucro Operacional")
         
         st.subheader("Aplicações da Análise CVL:")
         st.markdown("- Determinar o volume de vendas necessário para atingir um lucro-alvo")
@@ -548,6 +1069,14 @@ def main():
         
 
     
+    # Sem margem de contribuição positiva não há ponto de equilíbrio
+    if not np.isfinite(pe_unidades):
+        st.error(f"No cenário '{cenario}' o custo variável unitário é maior ou igual ao preço de venda: a margem de contribuição não é positiva e não existe ponto de equilíbrio. Revise os valores do cenário.")
+        # A comparação continua útil para ver por que este cenário não fecha
+        if len(df_cenarios) > 1:
+            exibir_comparacao_cenarios(df_cenarios, moeda, quantidade, quantidade)
+        return
+    
     # Exibir cálculos principais
     col1, col2, col3 = st.columns(3)
     
@@ -597,9 +1126,11 @@ def main():
     )
     
     # Calcular o lucro para a quantidade simulada
-    lucro_simulado = calcular_lucro(quantidade_simulada, mc_unitaria, cf_simulado)
-    receita_simulada = quantidade_simulada * pvu_simulado
-    custo_simulado = cf_simulado + (quantidade_simulada * cvu_simulado)
+    grafo.definir("quantidade_simulada", quantidade_simulada)
+    resultado = grafo.obter("resultado")
+    lucro_simulado = resultado.lucro
+    receita_simulada = resultado.receita_total
+    custo_simulado = resultado.custo_total
     
     # Mostrar resultados da simulação
     col1, col2, col3 = st.columns(3)
@@ -627,7 +1158,7 @@ def main():
         )
     
     # Gerar dados para o gráfico
-    df = gerar_dados_grafico(pvu_simulado, cvu_simulado, cf_simulado, max(quantidade, quantidade_simulada, pe_unidades * 1.5))
+    df = grafo.obter("dados_grafico")
     
     # Criar os gráficos
     st.markdown("<h3 class='sub-header'>Visualização Gráfica</h3>", unsafe_allow_html=True)
@@ -636,27 +1167,30 @@ def main():
     fig_cvl = criar_grafico_cvl(df, pe_unidades, moeda, quantidade_simulada)
     st.plotly_chart(fig_cvl, use_container_width=True)
     
+    # Curvas de margem de segurança e alavancagem operacional ao longo do volume
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_ms = criar_grafico_margem_seguranca(df, pe_unidades, quantidade_simulada, resultado.margem_seguranca_percentual)
+        st.plotly_chart(fig_ms, use_container_width=True)
+    
+    with col2:
+        fig_gao = criar_grafico_alavancagem(df, pe_unidades, quantidade_simulada, resultado.alavancagem)
+        st.plotly_chart(fig_gao, use_container_width=True)
+    
     # Gráfico de composição da margem de contribuição
     fig_mc = criar_grafico_mc(pvu_simulado, cvu_simulado, mc_unitaria, moeda)
     st.plotly_chart(fig_mc, use_container_width=True)
     
+    # Comparação de todos os cenários
+    if len(df_cenarios) > 1:
+        exibir_comparacao_cenarios(df_cenarios, moeda, quantidade, max(quantidade, quantidade_simulada))
+    
     # Interpretação dos resultados
     st.markdown("<h3 class='sub-header'>Análise e Interpretação</h3>", unsafe_allow_html=True)
     
     # Chamada da função para interpretar os resultados
-    interpretacao_html = interpretar_resultados(
-        {"pvu": pvu_simulado, "cvu": cvu_simulado, "cf": cf_simulado, "quantidade": quantidade_simulada}, 
-        {
-            "mc_unitaria": mc_unitaria,
-            "mc_percentual": mc_percentual,
-            "pe_unidades": pe_unidades,
-            "pe_valor": pe_valor,
-            "lucro": lucro_simulado,
-            "receita_total": receita_simulada,
-            "custo_total": custo_simulado,
-            "moeda": moeda
-        }
-    )
+    interpretacao_html = interpretar_resultados(resultado)
     
     st.markdown(interpretacao_html, unsafe_allow_html=True)
     
@@ -686,19 +1220,15 @@ def main():
             """)
         
         if quantidade_simulada > 0:
-            # Cálculo de métricas adicionais
-            margem_seguranca_unidades = quantidade_simulada - pe_unidades
-            margem_seguranca_percentual = (margem_seguranca_unidades / quantidade_simulada) * 100 if quantidade_simulada > 0 else 0
-            
-            # Cálculo da alavancagem operacional com verificação de divisão por zero
+            # Métricas adicionais (alavancagem não se aplica com lucro zero ou negativo)
             alavancagem = "Não aplicável (lucro zero ou negativo)"
-            if lucro_simulado > 0:
-                alavancagem = f"{((receita_simulada - quantidade_simulada * cvu_simulado) / lucro_simulado):.2f}"
+            if resultado.alavancagem is not None:
+                alavancagem = f"{resultado.alavancagem:.2f}"
 
             st.subheader("Métricas Adicionais")
             st.markdown(f"""
-            * **Margem de Segurança (unidades):** {margem_seguranca_unidades:.0f}
-            * **Margem de Segurança (%):** {margem_seguranca_percentual:.1f}%
+            * **Margem de Segurança (unidades):** {resultado.margem_seguranca_unidades:.0f}
+            * **Margem de Segurança (%):** {resultado.margem_seguranca_percentual:.1f}%
             * **Alavancagem Operacional:** {alavancagem}
             """)
     
@@ -706,25 +1236,7 @@ def main():
     st.markdown("<h3 class='sub-header'>Exportar Resultados</h3>", unsafe_allow_html=True)
     
     # Gerar link para download
-    dados_export = {
-        "pvu": pvu_simulado,
-        "cvu": cvu_simulado,
-        "cf": cf_simulado,
-        "quantidade": quantidade_simulada
-    }
-    
-    resultados_export = {
-        "mc_unitaria": mc_unitaria,
-        "mc_percentual": mc_percentual,
-        "pe_unidades": pe_unidades,
-        "pe_valor": pe_valor,
-        "lucro": lucro_simulado,
-        "receita_total": receita_simulada,
-        "custo_total": custo_simulado,
-        "moeda": moeda
-    }
-    
-    relatorio_html = gerar_relatorio(dados_export, resultados_export)
+    relatorio_html = gerar_relatorio(resultado)
     st.markdown(relatorio_html, unsafe_allow_html=True)
     
     # Dicionário de termos contábeis
@@ -0,0 +1,246 @@
+# Teste de carga local do aplicativo CVL
+#
+# Simula N sessões simultâneas executando o próprio CVL.py (via streamlit.testing) e
+# realizando as interações típicas de uma aula: trocar o caso prático, trocar a moeda,
+# arrastar o slider de quantidade e alternar o cenário simulado.
+#
+# Uso:
+#   python teste_carga.py --sessoes 30 --interacoes 20
+#   python teste_carga.py --sessoes 30 --limite-p95 500   # falha se o p95 passar de 500 ms
+#
+# Todas as sessões rodam em threads de um mesmo processo, de modo que a latência reflete a
+# disputa por CPU entre as reexecuções do script e o RSS reflete a memória retida por sessão.
+#
+# Limitações: os números são de um processo AppTest, não de um servidor `streamlit run`. O
+# Tornado, o websocket e a serialização dos deltas para o navegador não são medidos, então a
+# latência real por interação é maior e a capacidade real, menor. Use os resultados para
+# comparar versões do aplicativo entre si, não como a capacidade absoluta de um dyno.
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from streamlit.runtime import Runtime
+from streamlit.testing.v1 import AppTest, app_test
+
+SCRIPT_PADRAO = Path(__file__).resolve().parent / "CVL.py"
+
+ROTULO_MOEDA = "Selecione a moeda:"
+ROTULO_CASO = "Selecione um cenário pronto ou configure manualmente:"
+ROTULO_CENARIO = "Selecione um cenário para simular:"
+ROTULO_SLIDER = "Ajuste a quantidade vendida:"
+
+
+# O AppTest cria um runtime simulado (MagicMock) a cada execução, o instala em
+# Runtime._instance e o remove (None) ao final. Com sessões simultâneas, uma sessão que
+# termina removeria o runtime de outra ainda em execução; por isso a remoção é ignorada.
+# Cada execução continua instalando o próprio runtime simulado, sem trava: sessões
+# simultâneas sobrescrevem o runtime umas das outras e podem usar o de outra sessão. Isso não
+# reproduz o servidor real e só é aceitável porque o CVL.py não usa arquivos de mídia nem
+# caches do Streamlit.
+#
+# Depende de detalhes privados do Streamlit (o nome Runtime importado em
+# streamlit.testing.v1.app_test e o atributo Runtime._instance); verificar_streamlit()
+# interrompe o teste se eles mudarem numa atualização.
+class _MetaRuntimeCompartilhado(type):
+    def __setattr__(cls, nome, valor):
+        if nome == "_instance":
+            if valor is not None:
+                Runtime._instance = valor
+            return
+        super().__setattr__(nome, valor)
+
+
+class RuntimeCompartilhado(Runtime, metaclass=_MetaRuntimeCompartilhado):
+    pass
+
+
+# Função para verificar se os detalhes privados do Streamlit usados acima ainda existem
+def verificar_streamlit():
+    if getattr(app_test, "Runtime", None) is not Runtime or not hasattr(Runtime, "_instance"):
+        raise SystemExit(
+            "Esta versão do Streamlit não expõe app_test.Runtime/Runtime._instance como esperado; "
+            "revise RuntimeCompartilhado em teste_carga.py antes de usar o teste de carga."
+        )
+
+
+# Função para ler a memória residente (RSS) do processo, em bytes
+def ler_rss():
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Fora do Linux: usar o pico de RSS (KB no Linux, bytes no macOS)
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == "darwin" else pico * 1024
+
+
+# Função para localizar um widget pelo rótulo
+def buscar_widget(widgets, rotulo):
+    for widget in widgets:
+        if widget.label == rotulo:
+            return widget
+    raise LookupError(f"Widget não encontrado: {rotulo!r}")
+
+
+# Interações simuladas: cada uma altera um widget e devolve o AppTest pronto para executar
+def trocar_caso(app, sorteio):
+    caixa = buscar_widget(app.sidebar.selectbox, ROTULO_CASO)
+    return caixa.select(sorteio.choice([opcao for opcao in caixa.options if opcao != caixa.value]))
+
+
+def trocar_moeda(app, sorteio):
+    caixa = buscar_widget(app.sidebar.selectbox, ROTULO_MOEDA)
+    return caixa.select(sorteio.choice([opcao for opcao in caixa.options if opcao != caixa.value]))
+
+
+def arrastar_slider(app, sorteio):
+    slider = buscar_widget(app.slider, ROTULO_SLIDER)
+    return slider.set_value(sorteio.randint(int(slider.min), int(slider.max)))
+
+
+def alternar_cenario(app, sorteio):
+    radio = buscar_widget(app.sidebar.radio, ROTULO_CENARIO)
+    return radio.set_value(sorteio.choice([opcao for opcao in radio.options if opcao != radio.value]))
+
+
+INTERACOES = {
+    "trocar caso": trocar_caso,
+    "trocar moeda": trocar_moeda,
+    "arrastar slider": arrastar_slider,
+    "alternar cenário": alternar_cenario,
+}
+
+
+# Função que executa uma reexecução; devolve a duração ou None se estourar o timeout do AppTest
+def reexecutar(alvo):
+    inicio = time.perf_counter()
+    try:
+        alvo.run()
+    except RuntimeError as erro:
+        if "timed out" not in str(erro):
+            raise
+        return None
+    return time.perf_counter() - inicio
+
+
+# Função que executa uma sessão completa e registra a latência de cada reexecução
+def executar_sessao(indice, args, contagem, latencias, trava, sessoes_vivas):
+    sorteio = random.Random(args.semente + indice)
+    app = AppTest.from_file(str(args.script), default_timeout=args.timeout)
+    registros = []
+    falhas = widgets_ausentes = timeouts = 0
+
+    try:
+        interacoes = [("carga inicial", lambda: app)]
+        interacoes += [
+            (nome, lambda nome=nome: INTERACOES[nome](app, sorteio))
+            for nome in (sorteio.choice(list(INTERACOES)) for _ in range(args.interacoes))
+        ]
+        for nome, preparar in interacoes:
+            try:
+                alvo = preparar()
+            except LookupError:
+                # Widget ausente nesta tela (ex.: cenário sem ponto de equilíbrio); não é erro do aplicativo
+                widgets_ausentes += 1
+                continue
+            duracao = reexecutar(alvo)
+            if duracao is None:
+                # Após um timeout o estado da sessão é incerto: encerrá-la, como um aluno que desiste
+                timeouts += 1
+                break
+            registros.append((nome, duracao))
+            falhas += len(app.exception)
+            if args.pausa:
+                time.sleep(sorteio.uniform(0, args.pausa))
+    finally:
+        with trava:
+            for nome, duracao in registros:
+                latencias[nome].append(duracao)
+            contagem["erros"] += falhas
+            contagem["ausentes"] += widgets_ausentes
+            contagem["timeouts"] += timeouts
+            # Manter a sessão viva até o fim, como um aluno com a aba aberta
+            sessoes_vivas.append(app)
+
+
+# Função para imprimir o relatório de latência, memória e vazão
+def imprimir_relatorio(latencias, contagem, rss_inicial, rss_final, duracao, args):
+    print(f"\nSessões: {args.sessoes} | Interações por sessão: {args.interacoes} | Duração: {duracao:.1f} s")
+    print("Medido num processo AppTest (sem Tornado, websocket ou serialização de deltas).\n")
+    print(f"{'Interação':<18}{'n':>6}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}")
+
+    todas = []
+    for nome in ["carga inicial", *INTERACOES]:
+        valores = np.array(latencias.get(nome, [])) * 1000
+        if not len(valores):
+            continue
+        todas.append(valores)
+        p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+        print(f"{nome:<18}{len(valores):>6}{p50:>11.1f}{p95:>11.1f}{p99:>11.1f}")
+
+    todas = np.concatenate(todas) if todas else np.array([])
+    p95 = np.nan
+    if len(todas):
+        p50, p95, p99 = np.percentile(todas, [50, 95, 99])
+        print(f"{'total':<18}{len(todas):>6}{p50:>11.1f}{p95:>11.1f}{p99:>11.1f}")
+
+    crescimento = (rss_final - rss_inicial) / 2**20
+    print(f"\nRSS inicial: {rss_inicial / 2**20:.1f} MB | RSS final: {rss_final / 2**20:.1f} MB")
+    print(f"Crescimento do RSS por sessão: {crescimento / args.sessoes:.2f} MB")
+    print(f"Vazão: {len(todas) / duracao:.1f} reexecuções/s")
+    print(f"Erros no aplicativo: {contagem['erros']}")
+    print(f"Reexecuções com timeout: {contagem['timeouts']} (script excedeu --timeout {args.timeout:g} s; fora dos percentis, e a sessão é encerrada)")
+    print(f"Interações puladas (widget ausente na tela): {contagem['ausentes']}")
+    return p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga local do aplicativo CVL.")
+    parser.add_argument("--sessoes", type=int, default=10, help="Número de sessões simultâneas.")
+    parser.add_argument("--interacoes", type=int, default=20, help="Interações por sessão.")
+    parser.add_argument("--pausa", type=float, default=0.0, help="Pausa máxima (s) entre interações de uma sessão.")
+    parser.add_argument("--semente", type=int, default=0, help="Semente para sortear as interações.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Tempo máximo (s) de cada reexecução.")
+    parser.add_argument("--limite-p95", type=float, default=None, help="Falhar se o p95 total (ms) passar deste valor.")
+    parser.add_argument("--script", type=Path, default=SCRIPT_PADRAO, help="Script Streamlit a testar.")
+    args = parser.parse_args()
+
+    latencias = defaultdict(list)
+    contagem = {"erros": 0, "ausentes": 0, "timeouts": 0}
+    trava = threading.Lock()
+    sessoes_vivas = []
+
+    verificar_streamlit()
+    app_test.Runtime = RuntimeCompartilhado
+
+    # Aquecer importações e caches antes de medir a memória inicial (sem medir, sem timeout curto)
+    AppTest.from_file(str(args.script), default_timeout=max(args.timeout, 120.0)).run()
+    rss_inicial = ler_rss()
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessoes) as executor:
+        tarefas = [
+            executor.submit(executar_sessao, i, args, contagem, latencias, trava, sessoes_vivas)
+            for i in range(args.sessoes)
+        ]
+        for tarefa in tarefas:
+            tarefa.result()
+    duracao = time.perf_counter() - inicio
+
+    rss_final = ler_rss()
+    p95 = imprimir_relatorio(latencias, contagem, rss_inicial, rss_final, duracao, args)
+
+    if contagem["erros"] or contagem["timeouts"] or (args.limite_p95 is not None and p95 > args.limite_p95):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()